@@ -1,10 +1,11 @@
+from collections import namedtuple
+import contextlib
 import csv
-import matplotlib.pyplot as plt
+import multiprocessing as mp
 import numpy as np
 import os
-import random
-import time
-from plotter.navigation_map_plotter import is_point_in_obstacle, plot_navigation_map
+from plotter.navigation_map_plotter import plot_navigation_map
+from dataset import planner as astar_planner
 from dataset.planner import AStarPlanner
 
 ITERATIONS = 5
@@ -12,92 +13,231 @@ show_animation = True
 MAP_WIDTH = 120
 MAP_HEIGHT = 60
 CELL_SIZE = 5
-
-
-def save_path_data(start_x, start_y, goal_x, goal_y, path_x, path_y):
-    data = {
-        "Start_X": start_x,
-        "Start_Y": start_y,
-        "Goal_X": goal_x,
-        "Goal_Y": goal_y,
-        "Path_X": path_x,
-        "Path_Y": path_y,
-    }
-
-    file_exists = os.path.isfile("path_data.csv")
-
-    with open("path_data.csv", "a", newline="") as csvfile:
-        fieldnames = data.keys()
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow(data)
-
-
-def initialize_grid(obstacles, map_width, map_height, cell_size):
-    grid = [
-        [True for _ in range(map_height // cell_size + 1)]
-        for _ in range(map_width // cell_size + 1)
-    ]
-
-    for obs in obstacles:
-        for point in obs:
-            x, y = int(point[0] // cell_size), int(point[1] // cell_size)
-            if 0 <= x < len(grid) and 0 <= y < len(grid[0]):
-                grid[x][y] = False  # Mark cell as occupied
+PLANNER_RESOLUTION = 1
+ROBOT_RADIUS = 1.0
+SAMPLE_BATCH = 256
+PATH_DATA_FORMAT = "csv"  # "csv" or "npz"
+PATH_DATA_FILE = "path_data.csv"
+PATH_DATA_NPZ = "path_data.npz"
+PATH_DATA_HEADER = ("Start_X", "Start_Y", "Goal_X", "Goal_Y", "Path_X", "Path_Y")
+WRITE_BATCH = 100  # rows buffered before each CSV write
+SEED = None  # None draws fresh entropy for every run
+
+# One planned iteration, in PATH_DATA_HEADER column order
+PathRow = namedtuple("PathRow", "sx sy gx gy rx ry")
+
+# State shared by the iterations run in a worker, set up by init_worker
+_worker_free_cells = None
+_worker_planner = None
+_worker_entropy = None
+
+
+def _get_plt():
+    # matplotlib is only imported when plots are drawn, so runs without
+    # show_animation skip its startup cost
+    import matplotlib
+
+    matplotlib.use("Agg")  # plots are written to files, never shown
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def save_path_data(writer, rows):
+    # rows is a list of PathRow
+    writer.writerows(rows)
+    rows.clear()
+
+
+def save_path_npz(filename, rows):
+    # Paths of every row concatenated into flat arrays; the path of row i is
+    # path_x[offsets[i]:offsets[i + 1]] (and the same slice of path_y)
+    endpoints = np.array([row[:4] for row in rows], dtype=np.float32).reshape(-1, 4)
+    path_x = np.array([x for row in rows for x in row.rx], dtype=np.float32)
+    path_y = np.array([y for row in rows for y in row.ry], dtype=np.float32)
+    offsets = np.cumsum([0] + [len(row.rx) for row in rows])
+
+    # Like the CSV file, an existing archive is extended rather than replaced
+    if os.path.isfile(filename):
+        with np.load(filename) as data:
+            endpoints = np.concatenate((data["endpoints"], endpoints))
+            path_x = np.concatenate((data["path_x"], path_x))
+            path_y = np.concatenate((data["path_y"], path_y))
+            old_offsets = np.asarray(data["offsets"])
+            offsets = np.concatenate((old_offsets, old_offsets[-1] + offsets[1:]))
+
+    np.savez_compressed(
+        filename, endpoints=endpoints, path_x=path_x, path_y=path_y, offsets=offsets
+    )
+    rows.clear()
+
+
+def rasterize_obstacles(bboxes, resolution):
+    # Every grid point covered by an obstacle rectangle, edges included, so
+    # the planner map blocks the interiors and not only the corner points
+    ox, oy = [], []
+    for xmin, ymin, xmax, ymax in bboxes.tolist():
+        xs = np.append(np.arange(xmin, xmax, resolution), xmax)
+        ys = np.append(np.arange(ymin, ymax, resolution), ymax)
+        gx, gy = np.meshgrid(xs, ys)
+        ox.append(gx.ravel())
+        oy.append(gy.ravel())
+    return (
+        np.concatenate(ox).astype(np.float32),
+        np.concatenate(oy).astype(np.float32),
+    )
+
+
+def initialize_grid(points, map_width, map_height, cell_size):
+    grid = np.ones(
+        (map_width // cell_size + 1, map_height // cell_size + 1), dtype=bool
+    )
+
+    # Mark the cells holding an obstacle point as occupied, once per cell
+    cells = np.unique((points // cell_size).astype(int), axis=0)
+    inside = (
+        (cells[:, 0] >= 0)
+        & (cells[:, 0] < grid.shape[0])
+        & (cells[:, 1] >= 0)
+        & (cells[:, 1] < grid.shape[1])
+    )
+    grid[cells[inside, 0], cells[inside, 1]] = False
 
     return grid
 
 
-def generate_valid_point(grid, cell_size, map_width, map_height):
-    free_cells = [
-        (x, y) for x in range(len(grid)) for y in range(len(grid[0])) if grid[x][y]
-    ]
-    if not free_cells:
+def precompute_free_cells(grid):
+    # Cell indices are bounded by the grid shape, so int16 holds them as
+    # long as the grid is no larger than int16 allows
+    if max(grid.shape) > np.iinfo(np.int16).max + 1:
+        raise ValueError(f"Grid of shape {grid.shape} is too large for int16 cells.")
+    free_cells = np.argwhere(grid).astype(np.int16)
+    if not free_cells.size:
         raise Exception("No free space available.")
 
-    while True:
-        cell = random.choice(free_cells)
-        x = random.randint(
-            cell[0] * cell_size, min((cell[0] + 1) * cell_size, map_width)
-        )
-        y = random.randint(
-            cell[1] * cell_size, min((cell[1] + 1) * cell_size, map_height)
-        )
-        return (x, y)
+    return free_cells
 
 
-def main():
-    obstacles = plot_navigation_map()
-    grid = initialize_grid(obstacles, MAP_WIDTH, MAP_HEIGHT, CELL_SIZE)
-    planner = AStarPlanner(list(zip(*obstacles)), grid_size=1, robot_radius=1.0)
+def generate_valid_points(free_cells, cell_size, map_width, map_height, planner, rng):
+    # Draw candidates in batches and keep the ones on a cell the planner can
+    # start from or reach; its obstacle map is the only validity check
+    while True:
+        cells = free_cells[rng.integers(len(free_cells), size=SAMPLE_BATCH)]
+        cells = cells.astype(np.int64)  # map coordinates may exceed int16
+        low = cells * cell_size
+        high = np.minimum((cells + 1) * cell_size, (map_width, map_height))
+        candidates = rng.integers(low, high, endpoint=True)
+        valid = planner.verify_positions(candidates[:, 0], candidates[:, 1])
+        for x, y in candidates[valid].tolist():
+            yield (x, y)
+
+
+def init_worker(free_cells, planner, entropy):
+    global _worker_free_cells, _worker_planner, _worker_entropy
+    _worker_free_cells = free_cells
+    _worker_planner = planner
+    _worker_entropy = entropy
+    astar_planner.show_animation = False  # workers never draw
+
+
+def plan_one(seed):
+    # The RNG depends only on the run entropy and the iteration seed, so an
+    # iteration draws the same points whichever worker runs it
+    rng = np.random.default_rng([_worker_entropy, seed])
+    points = generate_valid_points(
+        _worker_free_cells, CELL_SIZE, MAP_WIDTH, MAP_HEIGHT, _worker_planner, rng
+    )
+
+    # Generate valid start and goal points, drawing new pairs until they lie
+    # in the same free-space component so the planner is never asked for an
+    # unreachable goal
+    sx, sy = next(points)
+    gx, gy = next(points)
+    while not _worker_planner.is_reachable(sx, sy, gx, gy):
+        sx, sy = next(points)
+        gx, gy = next(points)
+
+    rx, ry = _worker_planner.planning(sx, sy, gx, gy, animate=False)
+
+    return PathRow(sx, sy, gx, gy, rx, ry)
 
-    for _ in range(ITERATIONS):
 
-        # Generate valid start and goal points
-        start_point = generate_valid_point(grid, CELL_SIZE, MAP_WIDTH, MAP_HEIGHT)
-        goal_point = generate_valid_point(grid, CELL_SIZE, MAP_WIDTH, MAP_HEIGHT)
+def main():
+    if PATH_DATA_FORMAT not in ("csv", "npz"):
+        raise ValueError(
+            f'PATH_DATA_FORMAT must be "csv" or "npz", not {PATH_DATA_FORMAT!r}'
+        )
 
-        sx, sy = start_point
-        gx, gy = goal_point
+    obstacles = plot_navigation_map(render=False, validate=False)
+    grid = initialize_grid(obstacles.points, MAP_WIDTH, MAP_HEIGHT, CELL_SIZE)
+    free_cells = precompute_free_cells(grid)  # the grid is static for the run
+    ox, oy = rasterize_obstacles(obstacles.bboxes, PLANNER_RESOLUTION)
+    planner = AStarPlanner(ox, oy, resolution=PLANNER_RESOLUTION, rr=ROBOT_RADIUS)
+    # The sampler only keeps points the planner map leaves free, so it would
+    # never return without any
+    if planner.obstacle_flat.all():
+        raise Exception("No free space available.")
 
-        rx, ry = planner.planning(sx, sy, gx, gy)
+    entropy = np.random.SeedSequence(SEED).entropy
+    processes = max(1, min(os.cpu_count() or 1, ITERATIONS))
+    chunksize = max(1, ITERATIONS // (4 * processes))
+
+    with contextlib.ExitStack() as stack:
+        pool = stack.enter_context(
+            mp.Pool(
+                processes,
+                initializer=init_worker,
+                initargs=(free_cells, planner, entropy),
+            )
+        )
 
-        if rx and ry:  # Check if a valid path was found
-            save_path_data(sx, sy, gx, gy, rx, ry)  # Save path data to CSV
+        # Keep the CSV file and its writer open for the whole run; the NPZ
+        # archive is written once all iterations are done
+        writer = None
+        if PATH_DATA_FORMAT == "csv":
+            file_exists = os.path.isfile(PATH_DATA_FILE)
+            csvfile = stack.enter_context(open(PATH_DATA_FILE, "a", newline=""))
+            writer = csv.writer(csvfile)
+            if not file_exists:
+                writer.writerow(PATH_DATA_HEADER)
 
         if show_animation:  # pragma: no cover
-            plt.figure(figsize=(10, 6))
-            plt.plot(*zip(*obstacles), "sk", label="Obstacles")
-            plt.plot(sx, sy, "^r", label="Start Point")
-            plt.plot(gx, gy, "^c", label="Goal Point")
-            plt.plot(rx, ry, "-r", label="Planned Path")
-            plt.legend()
-            plt.show()
-
-        print("Path planning iteration completed.")
+            # The obstacles never change, so draw them once and only update
+            # the start, goal and path lines for each iteration
+            plt = _get_plt()
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.plot(ox, oy, "sk", label="Obstacles")
+            (start_line,) = ax.plot([], [], "^r", label="Start Point")
+            (goal_line,) = ax.plot([], [], "^c", label="Goal Point")
+            (path_line,) = ax.plot([], [], "-r", label="Planned Path")
+            ax.legend()
+
+        # Iterations are independent, so plan them in parallel; imap hands
+        # the results back in iteration order, keeping seeded runs identical
+        rows = []
+        results = pool.imap(plan_one, range(ITERATIONS), chunksize)
+        for i, row in enumerate(results):
+
+            if row.rx and row.ry:  # Check if a valid path was found
+                rows.append(row)
+            if writer is not None and len(rows) >= WRITE_BATCH:
+                save_path_data(writer, rows)  # Save path data to CSV
+
+            if show_animation:  # pragma: no cover
+                start_line.set_data([row.sx], [row.sy])
+                goal_line.set_data([row.gx], [row.gy])
+                path_line.set_data(row.rx, row.ry)
+                fig.savefig(f"iter_{i}.png")
+
+            print("Path planning iteration completed.")
+
+        if PATH_DATA_FORMAT == "csv":
+            save_path_data(writer, rows)
+        elif PATH_DATA_FORMAT == "npz":
+            save_path_npz(PATH_DATA_NPZ, rows)
+
+    if show_animation:  # pragma: no cover
+        plt.close(fig)
 
 
 if __name__ == "__main__":
@@ -10,7 +10,278 @@ See Wikipedia article (https://en.wikipedia.org/wiki/A*_search_algorithm)
 """
 
 import math
-import matplotlib.pyplot as plt
+from numba import njit
+import numpy as np
+
+show_animation = False
+ANIMATION_STEP = 200  # expanded nodes drawn per animation frame
+
+SQRT2 = math.sqrt(2)
+
+# dx, dy, cost of the 8-connected grid moves
+_MOTION = (
+    (1, 0, 1.0),
+    (0, 1, 1.0),
+    (-1, 0, 1.0),
+    (0, -1, 1.0),
+    (-1, -1, SQRT2),
+    (-1, 1, SQRT2),
+    (1, -1, SQRT2),
+    (1, 1, SQRT2),
+)
+
+
+@njit(cache=True)
+def _octile_distance(x1, y1, x2, y2):
+    # exact free-space cost of the 8-connected motion model
+    dx = abs(x1 - x2)
+    dy = abs(y1 - y2)
+    return (dx + dy) + (SQRT2 - 2) * min(dx, dy)
+
+
+@njit(cache=True)
+def _heap_push(heap_f, heap_id, heap_pos, size, f, n_id):
+    # insert n_id with key f, or decrease its key if it is already queued,
+    # then sift it up; heap_pos[n_id] tracks its slot (-1 when not queued)
+    i = heap_pos[n_id]
+    if i < 0:
+        i = size
+        size += 1
+    while i > 0:
+        up = (i - 1) // 2
+        if heap_f[up] <= f:
+            break
+        heap_f[i], heap_id[i] = heap_f[up], heap_id[up]
+        heap_pos[heap_id[i]] = i
+        i = up
+    heap_f[i], heap_id[i] = f, n_id
+    heap_pos[n_id] = i
+    return size
+
+
+@njit(cache=True)
+def _heap_pop(heap_f, heap_id, heap_pos, size):
+    # take the root, then sift the last entry down from the top
+    n_id = heap_id[0]
+    heap_pos[n_id] = -1
+    size -= 1
+    if size == 0:
+        return n_id, size
+    last_f, last_id = heap_f[size], heap_id[size]
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap_f[child + 1] < heap_f[child]:
+            child += 1
+        if last_f <= heap_f[child]:
+            break
+        heap_f[i], heap_id[i] = heap_f[child], heap_id[child]
+        heap_pos[heap_id[i]] = i
+        i = child
+    heap_f[i], heap_id[i] = last_f, last_id
+    heap_pos[last_id] = i
+    return n_id, size
+
+
+@njit(cache=True)
+def _trace_path(parent, goal_id):
+    # cell indices from the parent of goal_id back to the start
+    path = np.empty(len(parent), np.int64)
+    n = 0
+    index = parent[goal_id]
+    while index != -1:
+        path[n] = index
+        n += 1
+        index = parent[index]
+    return path[:n]
+
+
+@njit(cache=True)
+def _label_components(obstacle_flat, x_width, y_width, motion):
+    # flood fill the free cells over the motion model, giving each
+    # connected component its own label (-1 on obstacles)
+    n_cells = x_width * y_width
+    labels = np.full(n_cells, -1, np.int32)
+    stack = np.empty(n_cells, np.int64)
+    n_labels = 0
+    for seed in range(n_cells):
+        if obstacle_flat[seed] or labels[seed] != -1:
+            continue
+        labels[seed] = n_labels
+        stack[0] = seed
+        top = 1
+        while top > 0:
+            top -= 1
+            c_y, c_x = divmod(stack[top], x_width)
+            for i in range(len(motion)):
+                x = c_x + int(motion[i, 0])
+                y = c_y + int(motion[i, 1])
+                if x < 0 or y < 0 or x >= x_width or y >= y_width:
+                    continue
+                n_id = y * x_width + x
+                if obstacle_flat[n_id] or labels[n_id] != -1:
+                    continue
+                labels[n_id] = n_labels
+                stack[top] = n_id
+                top += 1
+        n_labels += 1
+    return labels
+
+
+@njit(cache=True)
+def _astar_core(obstacle_flat, x_width, y_width, motion, start_id, goal_id):
+    """
+    A* search over the flat obstacle grid
+
+    Returns whether the goal was reached, the parent index of every cell
+    (-1 where unset) and the expanded cell indices in expansion order.
+    """
+    n_cells = x_width * y_width
+    goal_y, goal_x = divmod(goal_id, x_width)
+    g_score = np.full(n_cells, np.inf)
+    parent = np.full(n_cells, -1, np.int64)
+    closed = np.zeros(n_cells, np.bool_)
+    expanded = np.empty(n_cells, np.int64)
+    n_expanded = 0
+
+    # indexed heap: every cell is queued at most once, improvements
+    # decrease its key in place
+    heap_f = np.empty(n_cells)
+    heap_id = np.empty(n_cells, np.int64)
+    heap_pos = np.full(n_cells, -1, np.int64)
+
+    start_y, start_x = divmod(start_id, x_width)
+    h = _octile_distance(start_x, start_y, goal_x, goal_y)
+    g_score[start_id] = 0.0
+    size = _heap_push(heap_f, heap_id, heap_pos, 0, h, start_id)
+
+    while size > 0:
+        c_id, size = _heap_pop(heap_f, heap_id, heap_pos, size)
+        c_cost = g_score[c_id]
+        closed[c_id] = True
+        expanded[n_expanded] = c_id
+        n_expanded += 1
+        if c_id == goal_id:
+            return True, parent, expanded[:n_expanded]
+
+        c_y, c_x = divmod(c_id, x_width)
+        for i in range(len(motion)):
+            x = c_x + int(motion[i, 0])
+            y = c_y + int(motion[i, 1])
+            if x < 0 or y < 0 or x >= x_width or y >= y_width:
+                continue
+            n_id = y * x_width + x
+            if obstacle_flat[n_id] or closed[n_id]:
+                continue
+
+            cost = c_cost + motion[i, 2]
+            if cost < g_score[n_id]:
+                g_score[n_id] = cost
+                parent[n_id] = c_id
+                h = _octile_distance(x, y, goal_x, goal_y)
+                size = _heap_push(heap_f, heap_id, heap_pos, size, cost + h, n_id)
+
+    return False, parent, expanded[:n_expanded]
+
+
+@njit(cache=True)
+def _bidirectional_core(obstacle_flat, x_width, y_width, motion, start_id, goal_id):
+    """
+    Bidirectional A* search over the flat obstacle grid
+
+    Alternates expansions between a search from the start towards the goal
+    (side 0) and one from the goal towards the start (side 1), and stops
+    once neither frontier can improve on the best meeting cost mu. The
+    backward parents along the best path are spliced into the forward
+    parent array, so the result has the same form as _astar_core's.
+    """
+    n_cells = x_width * y_width
+    g_score = np.full((2, n_cells), np.inf)
+    parent = np.full((2, n_cells), -1, np.int64)
+    closed = np.zeros((2, n_cells), np.bool_)
+    expanded = np.empty(2 * n_cells, np.int64)
+    n_expanded = 0
+
+    heap_f = np.empty((2, n_cells))
+    heap_id = np.empty((2, n_cells), np.int64)
+    heap_pos = np.full((2, n_cells), -1, np.int64)
+    sizes = np.zeros(2, np.int64)
+
+    if start_id == goal_id:
+        return True, parent[0], expanded[:0]
+    if obstacle_flat[goal_id]:
+        # like the forward search, never enter an occupied goal cell
+        return False, parent[0], expanded[:0]
+
+    targets = np.array((goal_id, start_id))
+    for side in range(2):
+        source = targets[1 - side]
+        s_y, s_x = divmod(source, x_width)
+        t_y, t_x = divmod(targets[side], x_width)
+        g_score[side, source] = 0.0
+        sizes[side] = _heap_push(
+            heap_f[side],
+            heap_id[side],
+            heap_pos[side],
+            0,
+            _octile_distance(s_x, s_y, t_x, t_y),
+            source,
+        )
+
+    mu, meet = np.inf, -1
+    side = 1
+    while sizes[0] > 0 and sizes[1] > 0:
+        # f is a lower bound on any path through a frontier cell
+        if max(heap_f[0, 0], heap_f[1, 0]) >= mu:
+            break
+
+        side = 1 - side
+        other = 1 - side
+        t_y, t_x = divmod(targets[side], x_width)
+        c_id, sizes[side] = _heap_pop(
+            heap_f[side], heap_id[side], heap_pos[side], sizes[side]
+        )
+        c_cost = g_score[side, c_id]
+        closed[side, c_id] = True
+        expanded[n_expanded] = c_id
+        n_expanded += 1
+
+        c_y, c_x = divmod(c_id, x_width)
+        for i in range(len(motion)):
+            x = c_x + int(motion[i, 0])
+            y = c_y + int(motion[i, 1])
+            if x < 0 or y < 0 or x >= x_width or y >= y_width:
+                continue
+            n_id = y * x_width + x
+            if obstacle_flat[n_id] or closed[side, n_id]:
+                continue
+
+            cost = c_cost + motion[i, 2]
+            if cost < g_score[side, n_id]:
+                g_score[side, n_id] = cost
+                parent[side, n_id] = c_id
+                sizes[side] = _heap_push(
+                    heap_f[side],
+                    heap_id[side],
+                    heap_pos[side],
+                    sizes[side],
+                    cost + _octile_distance(x, y, t_x, t_y),
+                    n_id,
+                )
+                if cost + g_score[other, n_id] < mu:
+                    mu, meet = cost + g_score[other, n_id], n_id
+
+    if meet == -1:
+        return False, parent[0], expanded[:n_expanded]
+
+    # re-point the backward chain from the meeting cell towards the goal
+    prev, index = meet, parent[1, meet]
+    while index != -1:
+        parent[0, index] = prev
+        prev, index = index, parent[1, index]
+    return True, parent[0], expanded[:n_expanded]
 
 
 class AStarPlanner:
@@ -30,29 +301,16 @@ class AStarPlanner:
         self.min_x, self.min_y = 0, 0
         self.max_x, self.max_y = 0, 0
         self.obstacle_map = None
+        self.obstacle_flat = None
+        self.components = None
+        self._gx, self._gy = None, None
         self.x_width, self.y_width = 0, 0
         self.motion = self.get_motion_model()
+        # float64 copy of the motion model handed to the jitted cores
+        self._motion_arr = np.asarray(self.motion, dtype=float)
         self.calc_obstacle_map(ox, oy)
 
-    class Node:
-        def __init__(self, x, y, cost, parent_index):
-            self.x = x  # index of grid
-            self.y = y  # index of grid
-            self.cost = cost
-            self.parent_index = parent_index
-
-        def __str__(self):
-            return (
-                str(self.x)
-                + ","
-                + str(self.y)
-                + ","
-                + str(self.cost)
-                + ","
-                + str(self.parent_index)
-            )
-
-    def planning(self, sx, sy, gx, gy):
+    def planning(self, sx, sy, gx, gy, animate=False):
         """
         A star path search
 
@@ -61,118 +319,95 @@ class AStarPlanner:
             s_y: start y position [m]
             gx: goal x position [m]
             gy: goal y position [m]
+            animate: plot the expanded nodes once the search is done
 
         output:
             rx: x position list of the final path
             ry: y position list of the final path
         """
 
-        start_node = self.Node(
-            self.calc_xy_index(sx, self.min_x),
-            self.calc_xy_index(sy, self.min_y),
-            0.0,
-            -1,
-        )
-        goal_node = self.Node(
-            self.calc_xy_index(gx, self.min_x),
-            self.calc_xy_index(gy, self.min_y),
-            0.0,
-            -1,
-        )
+        return self._search(_astar_core, sx, sy, gx, gy, animate)
 
-        open_set, closed_set = dict(), dict()
-        open_set[self.calc_grid_index(start_node)] = start_node
+    def planning_bidirectional(self, sx, sy, gx, gy, animate=False):
+        """
+        Bidirectional A star path search
 
-        while True:
-            if len(open_set) == 0:
-                print("Open set is empty..")
-                plt.close()
-                break
+        Searches from the start and from the goal at the same time and
+        joins the two searches where they meet. Same input and output as
+        planning.
+        """
 
-            c_id = min(
-                open_set,
-                key=lambda o: open_set[o].cost
-                + self.calc_heuristic(goal_node, open_set[o]),
+        return self._search(_bidirectional_core, sx, sy, gx, gy, animate)
+
+    def _search(self, core, sx, sy, gx, gy, animate):
+        start_x = self.calc_xy_index(sx, self.min_x)
+        start_y = self.calc_xy_index(sy, self.min_y)
+        goal_x = self.calc_xy_index(gx, self.min_x)
+        goal_y = self.calc_xy_index(gy, self.min_y)
+        start_id = self.calc_grid_index(start_x, start_y)
+        goal_id = self.calc_grid_index(goal_x, goal_y)
+
+        n_cells = self.x_width * self.y_width
+        if self.is_in_grid(start_x, start_y) and self.is_in_grid(goal_x, goal_y):
+            found, parent, expanded = core(
+                self.obstacle_flat,
+                self.x_width,
+                self.y_width,
+                self._motion_arr,
+                start_id,
+                goal_id,
             )
-            current = open_set[c_id]
-
-            # show graph
-            if show_animation:  # pragma: no cover
-                plt.plot(
-                    self.calc_grid_position(current.x, self.min_x),
-                    self.calc_grid_position(current.y, self.min_y),
-                    "xm",
-                    label="Current Node",
-                )
-                # for stopping simulation with the esc key.
-                plt.gcf().canvas.mpl_connect(
-                    "key_release_event",
-                    lambda event: [exit(0) if event.key == "escape" else None],
-                )
-                if len(closed_set.keys()) % 10 == 0:
-                    plt.pause(0.001)
-
-            if current.x == goal_node.x and current.y == goal_node.y:
-                print("Find goal")
-                goal_node.parent_index = current.parent_index
-                goal_node.cost = current.cost
-                break
-
-            # Remove the item from the open set
-            del open_set[c_id]
-
-            # Add it to the closed set
-            closed_set[c_id] = current
-
-            # expand_grid search grid based on motion model
-            for i, _ in enumerate(self.motion):
-                node = self.Node(
-                    current.x + self.motion[i][0],
-                    current.y + self.motion[i][1],
-                    current.cost + self.motion[i][2],
-                    c_id,
-                )
-                n_id = self.calc_grid_index(node)
-
-                # If the node is not safe, do nothing
-                if not self.verify_node(node):
-                    continue
-
-                if n_id in closed_set:
-                    continue
-
-                if n_id not in open_set:
-                    open_set[n_id] = node  # discovered a new node
-                else:
-                    if open_set[n_id].cost > node.cost:
-                        # This path is the best until now. record it
-                        open_set[n_id] = node
+        else:
+            found, parent, expanded = False, np.full(n_cells, -1), np.empty(0, int)
+
+        # show graph
+        animate = animate or show_animation
+        if animate:  # pragma: no cover
+            # matplotlib is only needed for the animation
+            import matplotlib.pyplot as plt
+
+            # for stopping simulation with the esc key.
+            plt.gcf().canvas.mpl_connect(
+                "key_release_event",
+                lambda event: [exit(0) if event.key == "escape" else None],
+            )
+            # redraw a single line every ANIMATION_STEP expanded nodes
+            (current_line,) = plt.plot([], [], "xm", label="Current Node")
+            c_y, c_x = np.divmod(expanded, self.x_width)
+            for start in range(0, len(expanded), ANIMATION_STEP):
+                end = start + ANIMATION_STEP
+                current_line.set_data(self._gx[c_x[:end]], self._gy[c_y[:end]])
+                plt.gcf().canvas.draw_idle()
+                plt.pause(0.001)
+
+        if found:
+            print("Find goal")
+        else:
+            print("Open set is empty..")
+            if animate:  # pragma: no cover
+                plt.close()
 
-        rx, ry = self.calc_final_path(goal_node, closed_set)
+        rx, ry = self.calc_final_path(goal_x, goal_y, parent)
 
         return rx, ry
 
-    def calc_final_path(self, goal_node, closed_set):
+    def calc_final_path(self, goal_x, goal_y, parent):
         # generate final course
-        rx, ry = [self.calc_grid_position(goal_node.x, self.min_x)], [
-            self.calc_grid_position(goal_node.y, self.min_y)
+        rx, ry = [self.calc_grid_position(goal_x, self.min_x)], [
+            self.calc_grid_position(goal_y, self.min_y)
         ]
-        parent_index = goal_node.parent_index
-        while parent_index != -1:
-            n = closed_set[parent_index]
-            rx.append(self.calc_grid_position(n.x, self.min_x))
-            ry.append(self.calc_grid_position(n.y, self.min_y))
-            parent_index = n.parent_index
-
-            def euclidean_distance(x1, y1, x2, y2):
-                return math.sqrt((x1 - x2) ** 2 + (y1 - y2) ** 2)
+        if self.is_in_grid(goal_x, goal_y):
+            goal_id = self.calc_grid_index(goal_x, goal_y)
+            path_y, path_x = np.divmod(_trace_path(parent, goal_id), self.x_width)
+            rx.extend(self._gx[path_x].tolist())
+            ry.extend(self._gy[path_y].tolist())
 
         return rx, ry
 
     @staticmethod
-    def calc_heuristic(n1, n2):
+    def calc_heuristic(x1, y1, x2, y2):
         w = 1.0  # weight of heuristic
-        d = w * math.hypot(n1.x - n2.x, n1.y - n2.y)
+        d = w * _octile_distance(x1, y1, x2, y2)
         return d
 
     def calc_grid_position(self, index, min_position):
@@ -189,34 +424,62 @@ class AStarPlanner:
     def calc_xy_index(self, position, min_pos):
         return round((position - min_pos) / self.resolution)
 
-    def calc_grid_index(self, node):
-        return (node.y - self.min_y) * self.x_width + (node.x - self.min_x)
+    def calc_grid_index(self, x, y):
+        return y * self.x_width + x
 
-    def verify_node(self, node):
-        px = self.calc_grid_position(node.x, self.min_x)
-        py = self.calc_grid_position(node.y, self.min_y)
+    def is_in_grid(self, x, y):
+        return 0 <= x < self.x_width and 0 <= y < self.y_width
 
-        if px < self.min_x:
-            return False
-        elif py < self.min_y:
-            return False
-        elif px >= self.max_x:
-            return False
-        elif py >= self.max_y:
+    def verify_node(self, x, y):
+        if not self.is_in_grid(x, y):
             return False
 
         # collision check
-        if self.obstacle_map[node.x][node.y]:
+        if self.obstacle_flat[self.calc_grid_index(x, y)]:
             return False
 
         return True
 
+    def is_reachable(self, sx, sy, gx, gy):
+        """
+        Check whether a path exists from the start to the goal position
+
+        Both positions have to lie on free cells of the same connected
+        component of the grid map.
+        """
+        start_x = self.calc_xy_index(sx, self.min_x)
+        start_y = self.calc_xy_index(sy, self.min_y)
+        goal_x = self.calc_xy_index(gx, self.min_x)
+        goal_y = self.calc_xy_index(gy, self.min_y)
+        if not (
+            self.verify_node(start_x, start_y) and self.verify_node(goal_x, goal_y)
+        ):
+            return False
+
+        start_label = self.components[self.calc_grid_index(start_x, start_y)]
+        goal_label = self.components[self.calc_grid_index(goal_x, goal_y)]
+        return start_label == goal_label
+
+    def verify_positions(self, px, py):
+        """
+        Check which world positions lie on free cells of the grid map
+
+        px: x position array [m]
+        py: y position array [m]
+        """
+        ix = np.round((np.asarray(px) - self.min_x) / self.resolution).astype(int)
+        iy = np.round((np.asarray(py) - self.min_y) / self.resolution).astype(int)
+        valid = (ix >= 0) & (iy >= 0) & (ix < self.x_width) & (iy < self.y_width)
+        valid[valid] = ~self.obstacle_flat[self.calc_grid_index(ix[valid], iy[valid])]
+        return valid
+
     def calc_obstacle_map(self, ox, oy):
 
-        self.min_x = round(min(ox))
-        self.min_y = round(min(oy))
-        self.max_x = round(max(ox))
-        self.max_y = round(max(oy))
+        ox, oy = np.asarray(ox), np.asarray(oy)
+        self.min_x = round(float(ox.min()))
+        self.min_y = round(float(oy.min()))
+        self.max_x = round(float(ox.max()))
+        self.max_y = round(float(oy.max()))
         print("min_x:", self.min_x)
         print("min_y:", self.min_y)
         print("max_x:", self.max_x)
@@ -227,32 +490,43 @@ class AStarPlanner:
         print("x_width:", self.x_width)
         print("y_width:", self.y_width)
 
-        # obstacle map generation
-        self.obstacle_map = [
-            [False for _ in range(self.y_width)] for _ in range(self.x_width)
-        ]
-        for ix in range(self.x_width):
-            x = self.calc_grid_position(ix, self.min_x)
-            for iy in range(self.y_width):
-                y = self.calc_grid_position(iy, self.min_y)
-                for iox, ioy in zip(ox, oy):
-                    d = math.hypot(iox - x, ioy - y)
-                    if d <= self.rr:
-                        self.obstacle_map[ix][iy] = True
-                        break
+        # world position of every grid column and row
+        self._gx = np.arange(self.x_width) * self.resolution + self.min_x
+        self._gy = np.arange(self.y_width) * self.resolution + self.min_y
+
+        # obstacle map generation: rasterize the obstacle points, then
+        # inflate them by the robot radius with a disk structuring element
+        r = math.ceil(self.rr / self.resolution)
+        ox_idx = np.round((ox - self.min_x) / self.resolution).astype(int)
+        oy_idx = np.round((oy - self.min_y) / self.resolution).astype(int)
+        raw = np.zeros((self.x_width + 2 * r, self.y_width + 2 * r), dtype=bool)
+        inside = (
+            (ox_idx >= -r)
+            & (ox_idx < self.x_width + r)
+            & (oy_idx >= -r)
+            & (oy_idx < self.y_width + r)
+        )
+        raw[ox_idx[inside] + r, oy_idx[inside] + r] = True
+
+        yy, xx = np.ogrid[-r : r + 1, -r : r + 1]
+        kernel = (xx * xx + yy * yy) * self.resolution**2 <= self.rr * self.rr
+
+        self.obstacle_map = np.zeros((self.x_width, self.y_width), dtype=bool)
+        for dx, dy in np.argwhere(kernel):
+            self.obstacle_map |= raw[dx : dx + self.x_width, dy : dy + self.y_width]
+
+        # the same map flattened in calc_grid_index order (y * x_width + x)
+        self.obstacle_flat = self.obstacle_map.ravel(order="F")
+
+        # connected free-space component of every cell, so unreachable
+        # goals are known without a search
+        self.components = _label_components(
+            self.obstacle_flat,
+            self.x_width,
+            self.y_width,
+            self._motion_arr,
+        )
 
     @staticmethod
     def get_motion_model():
-        # dx, dy, cost
-        motion = [
-            [1, 0, 1],
-            [0, 1, 1],
-            [-1, 0, 1],
-            [0, -1, 1],
-            [-1, -1, math.sqrt(2)],
-            [-1, 1, math.sqrt(2)],
-            [1, -1, math.sqrt(2)],
-            [1, 1, math.sqrt(2)],
-        ]
-
-        return motion
+        return _MOTION
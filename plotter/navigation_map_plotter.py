@@ -19,6 +19,8 @@ Usage Examples:
    goal_point = (100, 50)
    plot_navigation_map(start_point=start_point, goal_point=goal_point)
 
+   Pass render=False to get the obstacles without drawing anything.
+
 3. Checking if a point is within any obstacle (useful for dynamic obstacle addition or point 
    validation):
    
@@ -28,82 +30,205 @@ Usage Examples:
        [(15, 30), (15, 40), (26, 40), (26, 30)],
        # Add more obstacles as needed
    ]
-   is_in_obstacle = is_point_in_obstacle(point, obstacles)
+   bboxes = obstacle_bboxes(obstacles)
+   is_in_obstacle = is_point_in_obstacle(point, bboxes)
+
+   With many obstacles, index them once and pass the index along:
+
+   index = bbox_grid(bboxes)
+   is_in_obstacle = is_point_in_obstacle(point, bboxes, index)
    print(f"Point {point} is in an obstacle: {is_in_obstacle}")
 
+4. Checking a batch of points at once:
+
+   points = np.array([(30, 45), (10, 50), (50, 40)])
+   in_obstacle = are_points_in_obstacles(points, bboxes)
+
+All obstacles are axis-aligned rectangles, so the point checks compare against their
+bounding boxes (xmin, ymin, xmax, ymax) rather than running a general polygon test.
+The predefined obstacles and their bounding boxes are available as OBSTACLE_CORNERS and
+OBSTACLE_BBOXES, and as the float32 arrays of OBSTACLE_ARRAYS, which plot_navigation_map
+returns. All of them are read-only; copy them before making changes.
+
 Please ensure that any customization of start, goal points, or obstacles follows the expected 
 formats.
 """
 
-from typing import List, Tuple
-import matplotlib.pyplot as plt
-from matplotlib import patches
-from matplotlib.path import Path
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
 
 
 # Define a type alias for a point and an obstacle
 Point = Tuple[float, float]
-Obstacle = List[Point]
+Obstacle = Sequence[Point]
+BboxGrid = Dict[Tuple[int, int], List[int]]
+
+# Side length of the square cells of a bbox_grid index
+BBOX_GRID_CELL = 5
+
+
+def obstacle_bboxes(obstacles: Sequence[Obstacle]) -> np.ndarray:
+    """
+    Compute the axis-aligned bounding box of each obstacle.
 
+    Parameters:
+    obstacles (sequence): The obstacle corner points, each defined as a sequence of tuples.
 
-def is_point_in_obstacle(point: Point, obstacles: List[Obstacle]) -> bool:
+    Returns:
+    np.ndarray: An (N, 4) float32 array with one (xmin, ymin, xmax, ymax) row per obstacle.
+    """
+    bboxes = np.empty((len(obstacles), 4), dtype=np.float32)
+    for i, corners in enumerate(obstacles):
+        xs, ys = zip(*corners)
+        bboxes[i] = (min(xs), min(ys), max(xs), max(ys))
+    return bboxes
+
+
+def bbox_grid(bboxes: np.ndarray) -> BboxGrid:
+    """
+    Build a uniform grid index over the obstacle bounding boxes.
+
+    Parameters:
+    bboxes (np.ndarray): The (N, 4) obstacle bounding boxes from obstacle_bboxes.
+
+    Returns:
+    BboxGrid: A dict mapping each (x, y) cell of size BBOX_GRID_CELL to the indices of the
+    bounding boxes that touch it. Cells without obstacles are left out.
+    """
+    index: BboxGrid = {}
+    for i, (xmin, ymin, xmax, ymax) in enumerate(bboxes.tolist()):
+        for cx in range(int(xmin // BBOX_GRID_CELL), int(xmax // BBOX_GRID_CELL) + 1):
+            for cy in range(
+                int(ymin // BBOX_GRID_CELL), int(ymax // BBOX_GRID_CELL) + 1
+            ):
+                index.setdefault((cx, cy), []).append(i)
+    return index
+
+
+def is_point_in_obstacle(
+    point: Point, bboxes: np.ndarray, index: Optional[BboxGrid] = None
+) -> bool:
     """
     Check if the given point is within any of the defined obstacles.
 
     Parameters:
     point (tuple): The coordinates for the point to check (x, y).
-    obstacles (list): A list of obstacle corner points, each defined as a list of tuples.
+    bboxes (np.ndarray): The (N, 4) obstacle bounding boxes from obstacle_bboxes.
+    index (dict): Optional bbox_grid index of bboxes. When given, only the bounding boxes
+    touching the cell of the point are checked.
 
     Returns:
     bool: True if the point is within any obstacle, False otherwise.
     """
-    for corners in obstacles:
-        obstacle_path = Path(corners)
-        if obstacle_path.contains_point(point):
-            return True
-    return False
+    x, y = point
+    if index is not None:
+        cell = (int(x // BBOX_GRID_CELL), int(y // BBOX_GRID_CELL))
+        return any(
+            bboxes[i, 0] <= x <= bboxes[i, 2] and bboxes[i, 1] <= y <= bboxes[i, 3]
+            for i in index.get(cell, ())
+        )
 
+    hit = (
+        (bboxes[:, 0] <= x)
+        & (x <= bboxes[:, 2])
+        & (bboxes[:, 1] <= y)
+        & (y <= bboxes[:, 3])
+    )
+    return bool(hit.any())
 
-def plot_navigation_map(
-    start_point: Point = (10, 50), goal_point: Point = (110, 10)
-) -> List[Obstacle]:
+
+def _points_in_bboxes(points, bboxes):
+    # one pass over the boxes per point, stopping at the first hit
+    hit = np.zeros(len(points), np.bool_)
+    for i in range(len(points)):
+        x, y = points[i, 0], points[i, 1]
+        for j in range(len(bboxes)):
+            if bboxes[j, 0] <= x <= bboxes[j, 2] and bboxes[j, 1] <= y <= bboxes[j, 3]:
+                hit[i] = True
+                break
+    return hit
+
+
+@lru_cache(maxsize=None)
+def _get_points_in_bboxes():
+    # numba is only imported for batch queries, so the plotter itself runs
+    # with just matplotlib and numpy installed
+    from numba import njit
+
+    return njit(cache=True)(_points_in_bboxes)
+
+
+def are_points_in_obstacles(points: np.ndarray, bboxes: np.ndarray) -> np.ndarray:
     """
-    Plot a navigation map with predefined obstacles, a customizable start point, and goal point.
+    Check which of the given points are within any of the defined obstacles.
 
     Parameters:
-    start_point (tuple): The coordinates for the start point, default is (10, 50).
-    goal_point (tuple): The coordinates for the goal point, default is (110, 10).
-
-    A red triangle indicates the start point, and a cyan triangle indicates the goal point.
-    The map is enclosed with a border to define the navigable area.
+    points (np.ndarray): An (N, 2) array of point coordinates (x, y).
+    bboxes (np.ndarray): The (M, 4) obstacle bounding boxes from obstacle_bboxes.
 
     Returns:
-    List[Obstacle]: A list of obstacles with their corner points.
+    np.ndarray: A boolean array of length N, True where the point is within an obstacle.
     """
-    # Define the corner points of the obstacles as rectangles on the map
-    obstacle_corners: List[Obstacle] = [
-        # Each tuple represents the bottom left and top right corners of rectangles
-        [(0, 30), (0, 40), (7, 40), (7, 30)],
-        [(15, 30), (15, 40), (26, 40), (26, 30)],
-        [(20, 40), (20, 60), (21, 60), (21, 40)],
-        [(34, 30), (34, 40), (40, 40), (40, 30)],
-        [(36, 28), (36, 30), (40, 30), (40, 28)],
-        [(40, 28), (40, 33), (42, 33), (42, 28)],
-        [(40, 33), (40, 47), (42, 47), (42, 33)],
-        [(42, 33), (42, 47), (68, 47), (68, 33)],
-        [(62, 30), (62, 33), (68, 33), (68, 30)],
-        [(42, 10), (42, 13), (62, 13), (62, 10)],
-        [(62, 10), (62, 21), (68, 21), (68, 10)],
-        [(36, 10), (36, 20), (42, 20), (42, 10)],
-        [(36, 0), (36, 3), (68, 3), (68, 0)],
-        [(76, 20), (76, 24), (100, 24), (100, 20)],
-        [(88, 0), (88, 20), (100, 20), (100, 0)],
-        [(109, 24), (109, 30), (120, 30), (120, 24)],
-        [(116, 30), (116, 60), (120, 60), (120, 30)],
-        [(68, 56), (68, 60), (116, 60), (116, 56)],
-        [(40, 55), (40, 60), (68, 60), (68, 55)],
-    ]
+    points = np.ascontiguousarray(points, dtype=np.float32).reshape(-1, 2)
+    kernel = _get_points_in_bboxes()
+    return kernel(points, np.ascontiguousarray(bboxes, dtype=np.float32))
+
+
+# Corner points of the predefined obstacles, as rectangles on the map
+OBSTACLE_CORNERS: Tuple[Obstacle, ...] = (
+    # Each tuple represents the bottom left and top right corners of rectangles
+    ((0, 30), (0, 40), (7, 40), (7, 30)),
+    ((15, 30), (15, 40), (26, 40), (26, 30)),
+    ((20, 40), (20, 60), (21, 60), (21, 40)),
+    ((34, 30), (34, 40), (40, 40), (40, 30)),
+    ((36, 28), (36, 30), (40, 30), (40, 28)),
+    ((40, 28), (40, 33), (42, 33), (42, 28)),
+    ((40, 33), (40, 47), (42, 47), (42, 33)),
+    ((42, 33), (42, 47), (68, 47), (68, 33)),
+    ((62, 30), (62, 33), (68, 33), (68, 30)),
+    ((42, 10), (42, 13), (62, 13), (62, 10)),
+    ((62, 10), (62, 21), (68, 21), (68, 10)),
+    ((36, 10), (36, 20), (42, 20), (42, 10)),
+    ((36, 0), (36, 3), (68, 3), (68, 0)),
+    ((76, 20), (76, 24), (100, 24), (100, 20)),
+    ((88, 0), (88, 20), (100, 20), (100, 0)),
+    ((109, 24), (109, 30), (120, 30), (120, 24)),
+    ((116, 30), (116, 60), (120, 60), (120, 30)),
+    ((68, 56), (68, 60), (116, 60), (116, 56)),
+    ((40, 55), (40, 60), (68, 60), (68, 55)),
+)
+
+# Their bounding boxes and grid index, derived once at import time. The arrays
+# are shared with every caller of plot_navigation_map, so they are read-only
+OBSTACLE_BBOXES = obstacle_bboxes(OBSTACLE_CORNERS)
+OBSTACLE_BBOXES.setflags(write=False)
+_BBOX_GRID = bbox_grid(OBSTACLE_BBOXES)
+
+
+class ObstacleArrays(NamedTuple):
+    """
+    The predefined obstacles as float32 arrays, as returned by plot_navigation_map.
 
+    Fields:
+    corners (np.ndarray): The (N, 4, 2) corner points of each obstacle.
+    points (np.ndarray): The same corner points flattened to (N * 4, 2).
+    bboxes (np.ndarray): The (N, 4) bounding boxes from obstacle_bboxes.
+
+    The arrays are shared module state and read-only; copy them before making changes.
+    """
+
+    corners: np.ndarray
+    points: np.ndarray
+    bboxes: np.ndarray
+
+
+_corners = np.asarray(OBSTACLE_CORNERS, dtype=np.float32)
+_corners.setflags(write=False)
+OBSTACLE_ARRAYS = ObstacleArrays(_corners, _corners.reshape(-1, 2), OBSTACLE_BBOXES)
+
+
+def _validate_points(start_point: Point, goal_point: Point) -> None:
     # Check if the points are within the defined limits
     assert (
         0 < start_point[0] < 120 and 0 < start_point[1] < 60
@@ -114,16 +239,53 @@ def plot_navigation_map(
 
     # Ensure start and goal points are not on obstacles
     assert not is_point_in_obstacle(
-        start_point, obstacle_corners
+        start_point, OBSTACLE_BBOXES, _BBOX_GRID
     ), "Start point is located on an obstacle."
     assert not is_point_in_obstacle(
-        goal_point, obstacle_corners
+        goal_point, OBSTACLE_BBOXES, _BBOX_GRID
     ), "Goal point is located on an obstacle."
 
-    # Plot each obstacle with the defined corners
-    for corners in obstacle_corners:
-        polygon = patches.Polygon(corners, closed=True, color="k")
-        plt.gca().add_patch(polygon)
+
+def plot_navigation_map(
+    start_point: Point = (10, 50),
+    goal_point: Point = (110, 10),
+    render: bool = True,
+    validate: bool = True,
+) -> ObstacleArrays:
+    """
+    Plot a navigation map with predefined obstacles, a customizable start point, and goal point.
+
+    Parameters:
+    start_point (tuple): The coordinates for the start point, default is (10, 50).
+    goal_point (tuple): The coordinates for the goal point, default is (110, 10).
+    render (bool): Whether to draw and show the map, default is True. When False, only the
+    obstacles are returned and no matplotlib calls are made.
+    validate (bool): Whether to check that the start and goal points are inside the map and
+    not on an obstacle, default is True. The check is skipped under python -O.
+
+    A red triangle indicates the start point, and a cyan triangle indicates the goal point.
+    The map is enclosed with a border to define the navigable area.
+
+    Returns:
+    ObstacleArrays: The obstacle corners, their flattened points and bounding boxes as
+    float32 arrays.
+    """
+    if __debug__ and validate:
+        _validate_points(start_point, goal_point)
+
+    if not render:
+        return OBSTACLE_ARRAYS
+
+    # matplotlib is only needed for drawing
+    import matplotlib.pyplot as plt
+    from matplotlib import patches
+    from matplotlib.collections import PatchCollection
+
+    # Plot all obstacles with the defined corners as a single collection
+    obstacle_patches = [
+        patches.Polygon(corners, closed=True) for corners in OBSTACLE_CORNERS
+    ]
+    plt.gca().add_collection(PatchCollection(obstacle_patches, color="k"))
 
     # Plot the start and goal points
     plt.plot(*start_point, "^r")
@@ -141,7 +303,7 @@ def plot_navigation_map(
     # Display the plot with the obstacles and points
     plt.show()
 
-    return obstacle_corners
+    return OBSTACLE_ARRAYS
 
 
 if __name__ == "__main__":